@@ -1,21 +1,118 @@
 import os
+import re
 import datetime
-import math
+import time
+import threading
 import xml.etree.ElementTree as ET
-from flask import Flask, request, jsonify
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import numpy as np
+import orjson
+from flask import Flask, request, jsonify, g
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+from flask_caching import Cache
 from geopy.geocoders import Nominatim
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util.retry import Retry
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, which is much faster on large route payloads.
+
+    NumPy arrays (such as the route geometry) are serialized natively.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 # Initialize the Flask app and enable Cross-Origin Resource Sharing (CORS)
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 CORS(app)
 
+# Cache whole route analyses and upstream lookups; set CACHE_TYPE=RedisCache in production
+cache = Cache(app, config={
+    'CACHE_TYPE': os.environ.get('CACHE_TYPE', 'SimpleCache'),
+    'CACHE_DEFAULT_TIMEOUT': 300
+})
+
 # Initialize the geolocator with a custom user agent
 geolocator = Nominatim(user_agent="satwatch-route-analyzer/1.0")
+# Longest a request will wait for a Nominatim slot before giving up with a 503
+NOMINATIM_MAX_WAIT = 2
 # Define standard headers for external API requests
 HEADERS = {'User-Agent': 'satwatch-route-analyzer/1.0'}
 
+# (connect, read) timeout in seconds applied to every upstream request: 3 s to connect and 10 s for
+# each socket read while waiting on the response. Up to 2 retries are made for connection failures,
+# dropped or reset connections and 429/502/503/504 responses, with backoff of 0 s then 0.6 s
+# (Retry-After is ignored); a read timeout ends the call at once. The worst case is three attempts
+# that each fail just short of both timeouts: 3 x (3 s + 10 s) + 0.6 s = ~40 s. A body that keeps
+# trickling in is not bounded by this, since the read timeout only applies between bytes.
+HTTP_TIMEOUT = (3, 10)
+
+# Concurrent requests each gunicorn worker serves (shared with gunicorn_conf.py)
+WORKER_CONNECTIONS = int(os.environ.get('WORKER_CONNECTIONS', '200'))
+# Number of evenly spaced route points (endpoints included) checked for weather alerts
+WEATHER_SAMPLE_POINTS = 5
+
+# Shared HTTP session so connections to GDACS, OSRM and OpenWeatherMap are kept alive and reused.
+# Transient upstream failures are retried briefly with backoff.
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+
+class NoReadTimeoutRetry(Retry):
+    """Retry policy that gives up at once on read timeouts but still retries dropped or reset connections.
+
+    Retry(read=0) would also stop retrying aborted connections, since urllib3 counts those as read errors.
+    """
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if isinstance(error, ReadTimeoutError):
+            raise error.with_traceback(_stacktrace)
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+_retry = NoReadTimeoutRetry(total=2, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504],
+                            respect_retry_after_header=False)
+
+# Keep enough pooled connections per host for every in-flight request to reuse one. OpenWeatherMap
+# sees the most concurrency: up to WEATHER_SAMPLE_POINTS parallel lookups per request.
+_adapter = HTTPAdapter(pool_connections=10, pool_maxsize=WORKER_CONNECTIONS * WEATHER_SAMPLE_POINTS,
+                       max_retries=_retry)
+SESSION.mount('https://', _adapter)
+SESSION.mount('http://', _adapter)
+
+# Worker pool used to overlap the independent upstream calls made while analyzing a route. Each
+# in-flight request queues up to two jobs (GDACS download and weather lookups), so size it from the
+# same WORKER_CONNECTIONS setting gunicorn uses; under gevent these workers are greenlets.
+EXECUTOR = ThreadPoolExecutor(max_workers=2 * WORKER_CONNECTIONS)
+
+# Parsed GDACS alerts are reused for this many seconds; the feed only changes every few minutes
+GDACS_CACHE_TTL = 120
+# After a failed fetch, requests reuse the previous alerts (or none) for this long instead of retrying GDACS
+GDACS_FAILURE_TTL = 30
+_GDACS_CACHE = {'fetched_at': 0.0, 'ttl': GDACS_CACHE_TTL, 'alerts': None, 'ok': False}
+# Held by the one request refreshing the feed; others keep serving the stale copy meanwhile
+_GDACS_REFRESH_LOCK = threading.Lock()
+GEORSS_POINT_TAG = '{http://www.georss.org/georss}point'
+
+# Alerts within this distance of the route are reported; the bounding-box prefilter pads the
+# route by BBOX_PADDING_DEG degrees of latitude (~55 km), which safely covers the radius
+HAZARD_RADIUS_KM = 50
+BBOX_PADDING_DEG = 0.5
+# Number of nearest route points (by a cheap equirectangular estimate) checked exactly per alert
+NEAREST_POINTS_CHECKED = 5
+
+# Upper bound on the number of route vertices fed into the hazard proximity checks
+MAX_HAZARD_CHECK_POINTS = 200
+
+WEATHER_CACHE_TTL = 60
+
 # Securely get the OpenWeatherMap API key from the server's environment variables.
 OPENWEATHERMAP_API_KEY = os.environ.get('OPENWEATHERMAP_API_KEY')
 
@@ -88,64 +185,204 @@ MOCK_LOCAL_ADVISORIES = {
     }
 }
 
+# Lowercased advisory names compiled into a single pattern, so a destination is matched in one scan.
+# Longer names come first so they win over any shorter name starting at the same position.
+_ADVISORIES_BY_NAME = {name.lower(): advisory for name, advisory in MOCK_LOCAL_ADVISORIES.items()}
+_ADVISORY_PATTERN = re.compile('|'.join(re.escape(name) for name in sorted(_ADVISORIES_BY_NAME, key=len, reverse=True)))
+
 
-def haversine(lat1, lon1, lat2, lon2):
-    """Calculates the distance between two geographical points in kilometers."""
+def haversine_rad(lat1, lon1, cos_lat1, lat2, lon2, cos_lat2):
+    """Haversine distance in kilometers for coordinates already in radians with precomputed cos(lat)."""
     R = 6371
-    dlat = math.radians(lat2 - lat1)
-    dlon = math.radians(lon2 - lon1)
-    a = math.sin(dlat / 2)**2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
+    a = np.sin((lat2 - lat1) / 2)**2 + cos_lat1 * cos_lat2 * np.sin((lon2 - lon1) / 2)**2
+    return 2 * R * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+class GeocoderBusyError(Exception):
+    """Raised when no Nominatim request slot frees up within NOMINATIM_MAX_WAIT seconds."""
+
+def nominatim_geocode(query):
+    """Geocodes with Nominatim, keeping within its usage policy of at most one request per second.
+
+    Each call claims the start of a future wall-clock second with cache.add, which is atomic, and
+    sleeps until then. With a shared cache backend (CACHE_TYPE=RedisCache) the limit therefore holds
+    across all gunicorn workers; with the default SimpleCache it only holds within one process.
+    """
+    now = time.time()
+    for slot in range(int(now) + 1, int(now) + 1 + NOMINATIM_MAX_WAIT):
+        if cache.add(f"nominatim-slot:{slot}", True, timeout=NOMINATIM_MAX_WAIT + 1):
+            time.sleep(max(0.0, slot - time.time()))
+            return geolocator.geocode(query)
+    raise GeocoderBusyError("Geocoding service is busy, please try again shortly")
+
+@lru_cache(maxsize=4096)
+def _geocode(normalized_name):
+    """Geocodes a normalized place name to (latitude, longitude, address).
+
+    Raises LookupError when there is no match, so misses are never memoized by lru_cache.
+    """
+    location = nominatim_geocode(normalized_name)
+    if not location:
+        raise LookupError(normalized_name)
+    return location.latitude, location.longitude, location.address
+
+def geocode(name):
+    """Geocodes a place name, memoizing hits so repeated queries skip Nominatim. Returns None if not found."""
+    try:
+        return _geocode(name.strip().lower())
+    except LookupError:
+        return None
+
+def downsample_route(route_points, max_points=MAX_HAZARD_CHECK_POINTS):
+    """Thins an (N, 2) route array to at most max_points vertices, always keeping the final point."""
+    if len(route_points) <= max_points:
+        return route_points
+    step = -(-(len(route_points) - 1) // (max_points - 1))
+    indices = np.arange(0, len(route_points), step)
+    if indices[-1] != len(route_points) - 1:
+        indices = np.append(indices, len(route_points) - 1)
+    return route_points[indices]
 
 def fetch_local_advisories(end_loc_name):
     """Checks if the destination name matches a predefined high-risk area."""
-    local_hazards = []
-    for loc_name, advisory in MOCK_LOCAL_ADVISORIES.items():
-        if loc_name.lower() in end_loc_name.lower():
-            local_hazards.append(advisory)
-            break
-    return local_hazards
-
-def fetch_and_check_gdacs_alerts(route_points):
-    """Fetches and parses real-time global disaster alerts from GDACS."""
-    detected_hazards = []
+    match = _ADVISORY_PATTERN.search(end_loc_name.lower())
+    return [_ADVISORIES_BY_NAME[match.group(0)]] if match else []
+
+def fetch_gdacs_alerts():
+    """Fetches real-time global disaster alerts from GDACS.
+
+    Returns ((N, 2) array of [lat, lon], parallel list of titles) and a flag that is False when
+    the feed could not be fetched and stale or empty alerts were returned instead. The parsed
+    feed is cached for GDACS_CACHE_TTL seconds; a failed fetch is remembered for
+    GDACS_FAILURE_TTL seconds so an outage does not stall every request. Only one caller refreshes
+    an expired feed; concurrent callers get the stale copy, or wait for the first fetch if there is none.
+    """
+    cached_alerts = _GDACS_CACHE['alerts']
+    if cached_alerts is not None and time.monotonic() - _GDACS_CACHE['fetched_at'] < _GDACS_CACHE['ttl']:
+        return cached_alerts, _GDACS_CACHE['ok']
+    if not _GDACS_REFRESH_LOCK.acquire(blocking=cached_alerts is None):
+        return cached_alerts, _GDACS_CACHE['ok']
+    try:
+        return _refresh_gdacs_alerts()
+    finally:
+        _GDACS_REFRESH_LOCK.release()
+
+def _refresh_gdacs_alerts():
+    """Downloads and parses the GDACS feed into _GDACS_CACHE. Called with _GDACS_REFRESH_LOCK held."""
+    # Another caller may have refreshed the feed while this one waited for the lock
+    cached_alerts = _GDACS_CACHE['alerts']
+    if cached_alerts is not None and time.monotonic() - _GDACS_CACHE['fetched_at'] < _GDACS_CACHE['ttl']:
+        return cached_alerts, _GDACS_CACHE['ok']
+
+    coords, titles = [], []
     gdacs_url = "https://www.gdacs.org/rss.aspx?format=geo&alertlevel=Orange,Red"
     try:
-        response = requests.get(gdacs_url, timeout=10, headers=HEADERS)
-        response.raise_for_status()
-        root = ET.fromstring(response.content)
-        ns = {'georss': 'http://www.georss.org/georss'}
-
-        for item in root.findall('.//item'):
-            title = item.find('title').text
-            point_elem = item.find('georss:point', ns)
-            if point_elem is not None:
-                lat, lon = map(float, point_elem.text.split())
-                for route_point in route_points:
-                    if haversine(route_point[0], route_point[1], lat, lon) < 50:
-                        detected_hazards.append({'coords': [lat, lon], 'details': title, 'location_name': "Near your route"})
-                        break
+        with SESSION.get(gdacs_url, timeout=HTTP_TIMEOUT, stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            # Parse straight off the socket and detach each <item> from <channel> once its fields
+            # are read, so neither the body nor the parsed tree is ever held in memory as a whole
+            open_elements = []
+            for event, elem in ET.iterparse(response.raw, events=('start', 'end')):
+                if event == 'start':
+                    open_elements.append(elem)
+                    continue
+                open_elements.pop()
+                if elem.tag != 'item':
+                    continue
+                title = elem.findtext('title')
+                point_text = elem.findtext(GEORSS_POINT_TAG)
+                if open_elements:
+                    open_elements[-1].remove(elem)
+                if point_text:
+                    lat, lon = map(float, point_text.split())
+                    coords.append([lat, lon])
+                    titles.append(title)
     except Exception as e:
         print(f"Error fetching/parsing GDACS data: {e}")
+        # Serve the last good feed if there is one
+        alerts = cached_alerts if cached_alerts is not None else (np.empty((0, 2)), [])
+        ok, ttl = False, GDACS_FAILURE_TTL
+    else:
+        alerts = (np.array(coords, dtype=float).reshape(-1, 2), titles)
+        ok, ttl = True, GDACS_CACHE_TTL
+
+    _GDACS_CACHE['alerts'] = alerts
+    _GDACS_CACHE['ok'] = ok
+    _GDACS_CACHE['ttl'] = ttl
+    _GDACS_CACHE['fetched_at'] = time.monotonic()
+    return alerts, ok
+
+def check_gdacs_alerts(route_points, alerts):
+    """Returns the GDACS alerts that lie within HAZARD_RADIUS_KM of any point on an (N, 2) [lat, lon] route array."""
+    detected_hazards = []
+    alert_coords, titles = alerts
+    if not titles or not len(route_points):
+        return detected_hazards
+
+    points = np.asarray(route_points, dtype=np.float64)
+    # Cheap bounding-box prefilter; a degree of longitude shrinks towards the poles, so widen it there
+    max_abs_lat = min(np.abs(points[:, 0]).max() + BBOX_PADDING_DEG, 89.0)
+    padding = np.array([BBOX_PADDING_DEG, BBOX_PADDING_DEG / np.cos(np.radians(max_abs_lat))])
+    box_min = points.min(axis=0) - padding
+    box_max = points.max(axis=0) + padding
+    candidates = np.flatnonzero(((alert_coords >= box_min) & (alert_coords <= box_max)).all(axis=1))
+    if not candidates.size:
+        return detected_hazards
+
+    # Convert to radians and take cos(lat) once per point rather than once per pair
+    points_rad = np.radians(points)
+    points_cos = np.cos(points_rad[:, 0])
+    candidates_rad = np.radians(alert_coords[candidates])
+    candidates_cos = np.cos(candidates_rad[:, 0])
+
+    # Rank route points per alert with the equirectangular approximation (no trig per pair),
+    # then run the exact haversine only against each alert's few nearest points
+    dlat = candidates_rad[:, None, 0] - points_rad[None, :, 0]
+    dlon = (candidates_rad[:, None, 1] - points_rad[None, :, 1]) * candidates_cos[:, None]
+    k = min(NEAREST_POINTS_CHECKED, len(points))
+    nearest = np.argpartition(dlat**2 + dlon**2, k - 1, axis=1)[:, :k]
+    distances = haversine_rad(candidates_rad[:, None, 0], candidates_rad[:, None, 1], candidates_cos[:, None],
+                              points_rad[nearest, 0], points_rad[nearest, 1], points_cos[nearest])
+    for idx in candidates[(distances < HAZARD_RADIUS_KM).any(axis=1)]:
+        lat, lon = alert_coords[idx].tolist()
+        detected_hazards.append({'coords': [lat, lon], 'details': titles[idx], 'location_name': "Near your route"})
     return detected_hazards
 
+def fetch_point_weather(lat, lon):
+    """Fetches the current OpenWeatherMap conditions for a single point, cached for WEATHER_CACHE_TTL seconds."""
+    # Plain get/set rather than cache.memoize: memoize lazily creates a per-function version key on
+    # first use, which races when several fan-out threads miss at once
+    cache_key = f"owm:{lat:.4f},{lon:.4f}"
+    data = cache.get(cache_key)
+    if data is None:
+        weather_url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={OPENWEATHERMAP_API_KEY}"
+        response = SESSION.get(weather_url, timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        cache.set(cache_key, data, timeout=WEATHER_CACHE_TTL)
+    return data
+
 def fetch_weather_alerts(route_points):
-    """Fetches real-time weather alerts from OpenWeatherMap for key points on the route."""
+    """Fetches real-time weather alerts from OpenWeatherMap for key points on an (N, 2) [lat, lon] route array.
+
+    Returns the hazards and a flag that is False when any of the lookups failed.
+    """
     if not OPENWEATHERMAP_API_KEY:
         print("Skipping weather check: OpenWeatherMap API key not set.")
-        return []
+        return [], True
 
     weather_hazards = []
-    points_to_check = [route_points[0], route_points[len(route_points)//2], route_points[-1]]
-    
-    for point in points_to_check:
-        lat, lon = point
-        weather_url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={OPENWEATHERMAP_API_KEY}"
+    ok = True
+    indices = np.unique(np.linspace(0, len(route_points) - 1, WEATHER_SAMPLE_POINTS).astype(int))
+    points_to_check = route_points[indices].tolist()
+
+    # The lookups are independent, so issue them concurrently; denser sampling does not add latency
+    with ThreadPoolExecutor(max_workers=len(points_to_check)) as executor:
+        futures = [executor.submit(fetch_point_weather, *point) for point in points_to_check]
+
+    for point, future in zip(points_to_check, futures):
         try:
-            response = requests.get(weather_url, timeout=5)
-            response.raise_for_status()
-            data = response.json()
+            data = future.result()
             if data.get('weather') and 200 <= data['weather'][0]['id'] < 800:
                 weather_hazards.append({
                     'coords': point,
@@ -154,7 +391,8 @@ def fetch_weather_alerts(route_points):
                 })
         except Exception as e:
             print(f"Error fetching OpenWeatherMap data: {e}")
-    return weather_hazards
+            ok = False
+    return weather_hazards, ok
 
 def get_satellite_url(hazard_type=None):
     """Generates a dynamic NASA GIBS satellite imagery URL based on hazard type."""
@@ -163,7 +401,16 @@ def get_satellite_url(hazard_type=None):
         return f"https://gibs.earthdata.nasa.gov/wmts/epsg4326/best/VIIRS_SNPP_Thermal_Anomalies_375m_All/default/{date_today}/250m/{{z}}/{{y}}/{{x}}.png"
     return f"https://gibs.earthdata.nasa.gov/wmts/epsg4326/best/MODIS_Terra_CorrectedReflectance_TrueColor/default/{date_today}/250m/{{z}}/{{y}}/{{x}}.jpg"
 
+def is_cacheable_response(rv):
+    """Only complete, successful analyses are cached.
+
+    Error responses are returned as (response, status) tuples, and a response built while an upstream
+    hazard feed was failing is flagged with g.partial_result so it is not pinned in the route cache.
+    """
+    return not isinstance(rv, tuple) and not g.get('partial_result', False)
+
 @app.route('/api/route', methods=['GET'])
+@cache.cached(timeout=300, query_string=True, response_filter=is_cacheable_response)
 def analyze_route():
     """Main API endpoint to analyze a route and return hazards."""
     start_loc_name = request.args.get('start', '')
@@ -171,43 +418,54 @@ def analyze_route():
     start_lat = request.args.get('start_lat')
     start_lon = request.args.get('start_lon')
 
+    if not start_loc_name and not (start_lat and start_lon):
+        return jsonify({'error': 'Start location not provided'}), 400
+
+    # GDACS does not depend on the route, so download it while geocoding and routing are in progress
+    gdacs_future = EXECUTOR.submit(fetch_gdacs_alerts)
+
     try:
         if start_loc_name:
-            start_loc = geolocator.geocode(start_loc_name)
+            start_loc = geocode(start_loc_name)
             if not start_loc: return jsonify({'error': 'Could not find start location'}), 404
-            start_coords = [start_loc.longitude, start_loc.latitude]
-            start_name = start_loc.address
-        elif start_lat and start_lon:
+            lat, lon, start_name = start_loc
+            start_coords = [lon, lat]
+        else:
             start_coords = [float(start_lon), float(start_lat)]
             start_name = "Your Current Location"
-        else:
-            return jsonify({'error': 'Start location not provided'}), 400
 
-        end_loc = geolocator.geocode(end_loc_name)
+        end_loc = geocode(end_loc_name)
         if not end_loc: return jsonify({'error': 'Could not find destination'}), 404
-        end_coords = [end_loc.longitude, end_loc.latitude]
-        end_name = end_loc.address
+        lat, lon, end_name = end_loc
+        end_coords = [lon, lat]
+    except GeocoderBusyError as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         return jsonify({'error': f'Geocoding error: {str(e)}'}), 500
 
     osrm_url = f"http://router.project-osrm.org/route/v1/driving/{start_coords[0]},{start_coords[1]};{end_coords[0]},{end_coords[1]}?overview=full&geometries=geojson"
     try:
-        osrm_response = requests.get(osrm_url)
+        osrm_response = SESSION.get(osrm_url, timeout=HTTP_TIMEOUT)
         osrm_response.raise_for_status()
-        osrm_data = osrm_response.json()
+        osrm_data = orjson.loads(osrm_response.content)
     except Exception as e:
         return jsonify({'error': 'Could not fetch route from routing service.'}), 500
-    
+
     if 'routes' not in osrm_data or not osrm_data['routes']:
         return jsonify({'error': 'Could not find a route between locations'}), 404
 
-    route_points = [[p[1], p[0]] for p in osrm_data['routes'][0]['geometry']['coordinates']]
+    # OSRM returns [lon, lat] pairs; keep the route as a contiguous (N, 2) float64 array of [lat, lon]
+    coords = np.array(osrm_data['routes'][0]['geometry']['coordinates'], dtype=np.float64).reshape(-1, 2)
+    route_points = np.ascontiguousarray(coords[:, ::-1])
 
+    weather_future = EXECUTOR.submit(fetch_weather_alerts, route_points)
     local_hazards = fetch_local_advisories(end_name)
-    gdacs_hazards = fetch_and_check_gdacs_alerts(route_points)
-    weather_hazards = fetch_weather_alerts(route_points)
+    gdacs_alerts, gdacs_ok = gdacs_future.result()
+    gdacs_hazards = check_gdacs_alerts(downsample_route(route_points), gdacs_alerts)
+    weather_hazards, weather_ok = weather_future.result()
+    g.partial_result = not (gdacs_ok and weather_ok)
     all_hazards = local_hazards + gdacs_hazards + weather_hazards
-    
+
     satellite_url = get_satellite_url(all_hazards[0]['details'] if all_hazards else None)
 
     return jsonify({
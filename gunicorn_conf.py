@@ -0,0 +1,22 @@
+import multiprocessing
+import os
+
+# Run with: gunicorn -c gunicorn_conf.py app:app
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# The route analysis endpoint spends almost all of its time waiting on Nominatim, OSRM, GDACS and
+# OpenWeatherMap, so use cooperative gevent workers that can each keep many requests in flight.
+# The gevent worker monkey-patches the standard library before the app is imported.
+worker_class = 'gevent'
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# app.py sizes its background pool from the same variable so every connection can make progress
+worker_connections = int(os.environ.get('WORKER_CONNECTIONS', '200'))
+
+# For gevent workers this is only a heartbeat check: the worker is restarted if its event loop stops
+# reporting in for this long (e.g. blocked by CPU-bound work). It does not limit how long a single
+# request may run; that is bounded by the upstream timeouts and retry policy in app.py.
+timeout = 60
+
+# Import the app inside each worker (not in the master) so every process builds its own HTTP session,
+# connection pool and thread pool instead of inheriting sockets across fork
+preload_app = False